@@ -1,12 +1,31 @@
 import flet as ft
+import contextlib
+import logging
 import os
 import platform
 import subprocess
+import sys
 from ui import TimetableEditor
-from pdf_generator import TimetablePDF
-
-
-def main(page: ft.Page):
+from pdf_generator import TimetablePDF, OUTPUT_PROFILES
+import sessions
+
+# Style objects shared across sessions. Flet's ElevatedButton.before_update writes into its ButtonStyle
+# (color/bgcolor from the button's kwargs, re-wrapped shape/padding/text_style), so buttons using these
+# must not pass color/bgcolor themselves; each update then rewrites identical values.
+START_BTN_STYLE = ft.ButtonStyle(
+    bgcolor="#5E35B1", color="white",
+    padding={'top': 20, 'bottom': 20, 'left': 40, 'right': 40},
+    shape=ft.RoundedRectangleBorder(radius=30),
+    text_style=ft.TextStyle(size=16, weight="bold")
+)
+EXPORT_BTN_STYLE = ft.ButtonStyle(
+    bgcolor="#111827", color="white", padding=20,
+    shape=ft.RoundedRectangleBorder(radius=15)
+)
+CARD_SHADOW = ft.BoxShadow(blur_radius=10, color="#0D000000")
+
+
+def main(page: ft.Page, pdf_profile="default"):
     # --- APP CONFIG ---
     page.title = "Timetable Pro"
     page.theme_mode = ft.ThemeMode.LIGHT
@@ -16,6 +35,35 @@ def main(page: ft.Page):
     # We manage scrolling inside the views now
     page.scroll = None
 
+    # --- SERVER MODE: idle eviction ---
+    # Only the current editor and a getter for the profile fields are kept here,
+    # so dropping them (plus page.clean) releases the whole control tree.
+    view_state = {"editor": None, "profile": None}
+
+    def touch():
+        if sessions.store: sessions.store.touch(page.session_id)
+
+    def activity():
+        """Wraps an event handler so eviction never runs in the middle of it."""
+        return sessions.store.activity(page.session_id) if sessions.store else contextlib.nullcontext()
+
+    def snapshot_session():
+        """Returns the timetable model to keep, or None when no editor is open (called by SessionStore)."""
+        if not view_state["editor"]: return None
+        return {"editor": view_state["editor"].get_state(), "profile": view_state["profile"]()}
+
+    def drop_session_ui():
+        """Drops the editor controls once the model is saved (called by SessionStore)."""
+        view_state["editor"] = view_state["profile"] = None
+        page.clean()
+        page.add(build_welcome_view(resume=True))
+        page.update()
+
+    if sessions.store:
+        sessions.store.register(page, snapshot_session, drop_session_ui)
+        page.on_disconnect = lambda e: sessions.store.evict(page.session_id)
+        page.on_close = lambda e: sessions.store.remove(page.session_id)
+
     # --- 1. ANDROID-SPECIFIC HELPERS ---
     def is_android():
         """Detect if running on Android."""
@@ -52,18 +100,22 @@ def main(page: ft.Page):
     # --- 2. NAVIGATION LOGIC ---
 
     def go_to_editor(e):
-        page.clean()
-        page.add(build_editor_view())
-        page.update()
+        with activity():
+            model = sessions.store.take_model(page.session_id) if sessions.store else None
+            page.clean()
+            page.add(build_editor_view(model))
+            page.update()
 
     def go_back_to_welcome(e):
-        page.clean()
-        page.add(build_welcome_view())
-        page.update()
+        with activity():
+            view_state["editor"] = view_state["profile"] = None
+            page.clean()
+            page.add(build_welcome_view())
+            page.update()
 
     # --- 3. VIEW BUILDERS ---
 
-    def build_welcome_view():
+    def build_welcome_view(resume=False):
         """Builds the Welcome Screen (Centered & Safe)."""
         content = ft.Container(
             expand=True,  # Forces container to fill the screen
@@ -85,14 +137,9 @@ def main(page: ft.Page):
 
                 # Button
                 ft.ElevatedButton(
-                    "START CREATING",
+                    "RESUME EDITING" if resume else "START CREATING",
                     on_click=go_to_editor,
-                    style=ft.ButtonStyle(
-                        bgcolor="#5E35B1", color="white",
-                        padding={'top': 20, 'bottom': 20, 'left': 40, 'right': 40},
-                        shape=ft.RoundedRectangleBorder(radius=30),
-                        text_style=ft.TextStyle(size=16, weight="bold")
-                    )
+                    style=START_BTN_STYLE
                 ),
 
                 ft.Container(height=60),
@@ -112,8 +159,8 @@ def main(page: ft.Page):
         # Wrap in SafeArea to respect Android status bar
         return ft.SafeArea(content, expand=True)
 
-    def build_editor_view():
-        """Builds the Main Editor with AppBar."""
+    def build_editor_view(model=None):
+        """Builds the Main Editor with AppBar (restoring an evicted model if given)."""
 
         # --- Form Components ---
         def style_input(label):
@@ -124,7 +171,8 @@ def main(page: ft.Page):
                 focused_border_color="#5E35B1",
                 text_size=14,
                 content_padding=15,
-                bgcolor="#F9FAFB"
+                bgcolor="#F9FAFB",
+                on_change=lambda e: touch()
             )
 
         full_name = style_input("Full Name")
@@ -139,7 +187,8 @@ def main(page: ft.Page):
                 ft.Container(content=ft.Radio(value="Female", label="Female (Pink)"), padding=10, bgcolor="#FCE4EC",
                              border_radius=10)
             ], alignment=ft.MainAxisAlignment.CENTER),
-            value="Male"
+            value="Male",
+            on_change=lambda e: touch()
         )
 
         form_card = ft.Container(
@@ -152,31 +201,45 @@ def main(page: ft.Page):
                 gender
             ], spacing=12),
             padding=20, margin=15, bgcolor="white", border_radius=20,
-            shadow=ft.BoxShadow(blur_radius=10, color="#0D000000")
+            shadow=CARD_SHADOW
         )
 
-        editor = TimetableEditor()
+        editor = TimetableEditor(state=model["editor"] if model else None, activity=activity)
+
+        def get_profile():
+            return {"name": full_name.value, "class_name": class_name.value, "year": acad_year.value,
+                    "serial": student_no.value, "gender": gender.value}
+
+        if model:
+            profile = model["profile"]
+            full_name.value, class_name.value = profile["name"], profile["class_name"]
+            acad_year.value, student_no.value = profile["year"], profile["serial"]
+            gender.value = profile["gender"]
+
+        view_state["editor"], view_state["profile"] = editor, get_profile
         status_txt = ft.Text("", size=14, text_align="center")
 
         def generate(e):
-            if not full_name.value:
+            # Only copying the model holds the session lock; building and opening the PDF run outside it.
+            # page.update() (not status_txt.update()) stays safe if the session is evicted meanwhile.
+            with activity():
+                user = get_profile()
+                state = editor.get_state()
+            export_pdf(user, state)
+
+        def export_pdf(user, state):
+            if not user["name"]:
                 status_txt.value = "⚠️ Please enter your name"
                 status_txt.color = "red"
-                status_txt.update()
+                page.update()
                 return
 
             status_txt.value = "Generating..."
             status_txt.color = "blue"
-            status_txt.update()
-
-            user = {
-                "name": full_name.value, "class_name": class_name.value,
-                "year": acad_year.value, "serial": student_no.value,
-                "gender": gender.value
-            }
+            page.update()
 
             # --- FILE PATH LOGIC ---
-            safe_name = "".join([c if c.isalnum() else "_" for c in full_name.value])
+            safe_name = "".join([c if c.isalnum() else "_" for c in user["name"]])
             filename = f"Timetable_{safe_name}.pdf"
 
             try:
@@ -192,7 +255,8 @@ def main(page: ft.Page):
                 full_path = filename
 
             try:
-                pdf = TimetablePDF(full_path, user, editor.days, editor.times, editor.grid_data, editor.merges)
+                pdf = TimetablePDF(full_path, user, state["days"], state["times"], state["grid_data"], state["merges"],
+                                  profile=pdf_profile)
                 pdf.generate()
 
                 status_txt.value = f"✅ Saved: {filename}"
@@ -212,10 +276,7 @@ def main(page: ft.Page):
         btn_gen = ft.Container(
             content=ft.ElevatedButton(
                 "EXPORT PDF", icon="file_download",
-                style=ft.ButtonStyle(
-                    bgcolor="#111827", color="white", padding=20,
-                    shape=ft.RoundedRectangleBorder(radius=15)
-                ),
+                style=EXPORT_BTN_STYLE,
                 width=300, on_click=generate
             ),
             alignment=ft.alignment.center,
@@ -255,4 +316,19 @@ def main(page: ft.Page):
 
 
 if __name__ == "__main__":
-    ft.app(target=main)
\ No newline at end of file
+    # Checked here so a typo fails at startup, not on the first export
+    pdf_profile = os.environ.get("TIMETABLE_PDF_PROFILE", "default")
+    if pdf_profile not in OUTPUT_PROFILES:
+        sys.exit(f"Unknown TIMETABLE_PDF_PROFILE {pdf_profile!r}; expected one of: {', '.join(OUTPUT_PROFILES)}")
+
+    def app_main(page: ft.Page):
+        main(page, pdf_profile=pdf_profile)
+
+    if "--server" in sys.argv:
+        # Multi-session web deployment: idle sessions keep only their model
+        logging.basicConfig(level=logging.INFO)
+        sessions.enable(idle_timeout=int(os.environ.get("TIMETABLE_IDLE_TIMEOUT", 15 * 60)),
+                        stats_file=os.environ.get("TIMETABLE_STATS_FILE"))
+        ft.app(target=app_main, view=None, port=int(os.environ.get("PORT", 8550)))
+    else:
+        ft.app(target=app_main)
\ No newline at end of file
@@ -3,8 +3,30 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.colors import HexColor
 from reportlab.lib.units import mm
 
+# Output profiles for TimetablePDF:
+#   compress      -> force deflated page streams (None = ReportLab's rl_config default, which already compresses)
+#   dedupe        -> skip setFillColor/setFont calls that repeat the current state (drawing order is unchanged)
+#   deterministic -> fixed creation date and document ID (identical input = identical bytes)
+OUTPUT_PROFILES = {
+    "default": {"compress": None, "dedupe": False, "deterministic": False},
+    "distribution": {"compress": True, "dedupe": True, "deterministic": True},
+}
+
+EMPTY_CELL_BG = HexColor("#FDFDFD")
+EMPTY_CELL_BG_ALT = HexColor("#F9F9F9")  # Subtle checker
+
 
 class PDFTheme:
+    # Themes never change once built, so every PDF (and every session) reuses them
+    _cache = {}
+
+    @classmethod
+    def for_gender(cls, gender):
+        theme = cls._cache.get(gender)
+        if theme is None:
+            theme = cls._cache[gender] = cls(gender)
+        return theme
+
     def __init__(self, gender):
         if gender == "Female":
             # FIXED: Elegant, High-Contrast Female Theme
@@ -27,27 +49,53 @@ class PDFTheme:
 
 
 class TimetablePDF:
-    def __init__(self, filename, user_data, days, times, grid_data, merges):
+    def __init__(self, filename, user_data, days, times, grid_data, merges, profile="default"):
         self.filename = filename
         self.user_data = user_data
         self.days = days  # Rows
         self.times = times  # Columns
         self.grid_data = grid_data
         self.merges = merges
-        self.theme = PDFTheme(user_data['gender'])
+        self.theme = PDFTheme.for_gender(user_data['gender'])
 
         self.width, self.height = landscape(A4)
         self.margin = 15 * mm
-        self.c = canvas.Canvas(filename, pagesize=landscape(A4))
 
-    def draw_rounded_rect(self, x, y, w, h, color, radius=4):
+        if profile not in OUTPUT_PROFILES:
+            raise ValueError(f"Unknown PDF profile: {profile}")
+        self.profile = OUTPUT_PROFILES[profile]
+        self.c = canvas.Canvas(filename, pagesize=landscape(A4),
+                               pageCompression=1 if self.profile["compress"] else None,
+                               invariant=1 if self.profile["deterministic"] else None)
+
+        # Last drawing state sent to the canvas (only used when deduping)
+        self._fill = self._font = None
+
+    # --- DRAWING STATE ---
+    @staticmethod
+    def _color_key(color):
+        return (color.red, color.green, color.blue, color.alpha)
+
+    def set_fill(self, color):
+        key = self._color_key(color)
+        if self.profile["dedupe"] and key == self._fill: return
+        self._fill = key
         self.c.setFillColor(color)
-        self.c.setStrokeColor(color)
+
+    def set_font(self, font, size):
+        if self.profile["dedupe"] and (font, size) == self._font: return
+        self._font = (font, size)
+        self.c.setFont(font, size)
+
+    def draw_rounded_rect(self, x, y, w, h, color, radius=4):
+        # stroke=0, so no stroke colour is needed
+        self.set_fill(color)
         self.c.roundRect(x, y, w, h, radius, fill=1, stroke=0)
 
     def draw_text(self, text, x, y, w, h, color, font="Helvetica", size=10, align="center"):
-        self.c.setFillColor(color)
-        self.c.setFont(font, size)
+        if not text.strip(): return  # Nothing visible to draw (empty cells)
+        self.set_fill(color)
+        self.set_font(font, size)
         text_w = self.c.stringWidth(text, font, size)
 
         if align == "center":
@@ -76,13 +124,13 @@ class TimetablePDF:
 
         # --- 1. HEADER SECTION ---
         # Left: Title
-        c.setFont("Helvetica-Bold", 26)
-        c.setFillColor(self.theme.text_main)
+        self.set_font("Helvetica-Bold", 26)
+        self.set_fill(self.theme.text_main)
         c.drawString(self.margin, self.height - 25 * mm, "School Timetable")
 
         # Right: Academic Year
-        c.setFont("Helvetica", 14)
-        c.setFillColor(self.theme.text_main)
+        self.set_font("Helvetica", 14)
+        self.set_fill(self.theme.text_main)
         year_txt = f"Academic Year: {self.user_data['year']}"
         c.drawRightString(self.width - self.margin, self.height - 25 * mm, year_txt)
 
@@ -163,8 +211,8 @@ class TimetablePDF:
                 except:
                     val = ""
 
-                bg = self.theme.cell_bg if val.strip() else HexColor("#FDFDFD")
-                if (r_idx + c_idx) % 2 == 1 and not val.strip(): bg = HexColor("#F9F9F9")  # Subtle checker
+                bg = self.theme.cell_bg if val.strip() else EMPTY_CELL_BG
+                if (r_idx + c_idx) % 2 == 1 and not val.strip(): bg = EMPTY_CELL_BG_ALT
 
                 self.draw_rounded_rect(x, cell_y_adjusted, cell_w_total, cell_h_total, bg)
                 self.draw_text(val, x, cell_y_adjusted, cell_w_total, cell_h_total, self.theme.text_main, size=10)
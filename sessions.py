@@ -0,0 +1,192 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+import flet as ft
+
+logger = logging.getLogger("timetable.sessions")
+
+# Process-wide store, set by enable() in server mode; None for the single-user app
+store = None
+
+
+def enable(idle_timeout=15 * 60, sweep_interval=60, stats_file=None):
+    """Creates the process-wide SessionStore and starts its sweeper."""
+    global store
+    store = SessionStore(idle_timeout=idle_timeout, sweep_interval=sweep_interval, stats_file=stats_file)
+    store.start()
+    return store
+
+
+def count_controls(controls):
+    """Counts the controls in a tree, following the public `controls`/`content` attributes."""
+    total = 0
+    stack = list(controls)
+    while stack:
+        ctrl = stack.pop()
+        if ctrl is None: continue
+        total += 1
+        children = getattr(ctrl, "controls", None)
+        if isinstance(children, list): stack.extend(list(children))  # Copy: another thread may edit it
+        content = getattr(ctrl, "content", None)
+        if isinstance(content, ft.Control): stack.append(content)
+    return total
+
+
+class SessionEntry:
+    def __init__(self, page, snapshot, drop_ui):
+        self.page = page
+        self.snapshot = snapshot  # Returns the model to keep, or None if there is nothing to evict
+        self.drop_ui = drop_ui  # Releases the controls once the model is saved
+        self.model = None  # Persisted model while the session is evicted
+        self.evicted = False
+        self.last_seen = time.monotonic()
+        # Held by event handlers (see SessionStore.activity) and by eviction, so they never interleave
+        self.lock = threading.RLock()
+
+
+class SessionStore:
+    """Server mode: tracks sessions, evicts idle control trees and keeps only their model."""
+
+    def __init__(self, idle_timeout=15 * 60, sweep_interval=60, stats_file=None):
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self.stats_file = stats_file
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _entry(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    # --- REGISTRATION ---
+    def register(self, page, snapshot, drop_ui):
+        with self._lock:
+            self._sessions[page.session_id] = SessionEntry(page, snapshot, drop_ui)
+
+    def remove(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def touch(self, session_id):
+        entry = self._entry(session_id)
+        if entry: entry.last_seen = time.monotonic()
+
+    def activity(self, session_id):
+        """Context manager for event handlers: blocks eviction while the handler runs."""
+        entry = self._entry(session_id)
+        if not entry: return contextlib.nullcontext()
+        return self._activity(entry)
+
+    @contextlib.contextmanager
+    def _activity(self, entry):
+        with entry.lock:
+            entry.last_seen = time.monotonic()
+            try:
+                yield
+            finally:
+                entry.last_seen = time.monotonic()
+
+    # --- MODEL ---
+    def take_model(self, session_id):
+        """Returns the persisted model (if any) and marks the session as live again."""
+        entry = self._entry(session_id)
+        if not entry: return None
+        with entry.lock:
+            model, entry.model, entry.evicted = entry.model, None, False
+            entry.last_seen = time.monotonic()
+            return model
+
+    # --- EVICTION ---
+    def evict(self, session_id, idle_only=False):
+        """Saves the session's model, then drops its controls. Returns True if it was evicted.
+
+        The idle sweep (idle_only) skips sessions whose handler is still running instead of waiting,
+        so one slow handler cannot stall eviction for everyone else.
+        """
+        entry = self._entry(session_id)
+        if not entry: return False
+        if not entry.lock.acquire(blocking=not idle_only): return False
+        try:
+            if entry.evicted: return False
+            # Re-check under the lock: a handler may have touched the session since the sweep started
+            if idle_only and time.monotonic() - entry.last_seen <= self.idle_timeout: return False
+            model = entry.snapshot()
+            if model is None: return False  # Nothing held (e.g. welcome screen)
+            entry.model, entry.evicted = model, True
+            try:
+                entry.drop_ui()
+            except Exception:
+                # The model is already saved; a failed UI refresh (e.g. disconnected page) loses nothing
+                logger.exception("Could not drop controls for session %s", session_id)
+            return True
+        finally:
+            entry.lock.release()
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            idle = [sid for sid, entry in self._sessions.items()
+                    if not entry.evicted and now - entry.last_seen > self.idle_timeout]
+        return sum(1 for sid in idle if self.evict(sid, idle_only=True))
+
+    # --- SIZE GAUGE ---
+    def gauge(self, session_id):
+        """Per-session size gauge: controls currently on the page and bytes of persisted model.
+
+        Python cannot attribute heap memory to a session exactly, so these counts are the proxy.
+        Read without the session lock (a busy handler must not stall the sweeper), so a value may be
+        one event out of date.
+        """
+        entry = self._entry(session_id)
+        if not entry: return None
+        model = entry.model
+        return {
+            "session_id": session_id,
+            "evicted": entry.evicted,
+            "controls": count_controls(entry.page.controls),
+            "model_bytes": len(json.dumps(model)) if model else 0,
+            "idle_seconds": int(time.monotonic() - entry.last_seen),
+        }
+
+    def stats(self):
+        with self._lock:
+            ids = list(self._sessions)
+        sessions = [g for g in (self.gauge(sid) for sid in ids) if g]
+        return {
+            "sessions": len(sessions),
+            "evicted": sum(1 for s in sessions if s["evicted"]),
+            "controls": sum(s["controls"] for s in sessions),
+            "model_bytes": sum(s["model_bytes"] for s in sessions),
+            "per_session": sessions,
+        }
+
+    def write_stats(self, stats):
+        """Writes stats as JSON to stats_file (atomically), for operators and monitoring to read."""
+        if not self.stats_file: return
+        tmp = f"{self.stats_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(stats, f, indent=2)
+        os.replace(tmp, self.stats_file)
+
+    # --- BACKGROUND SWEEPER ---
+    def start(self):
+        if self._thread: return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                evicted = self.evict_idle()
+                stats = self.stats()
+                logger.info("%d sessions (%d evicted), %d controls, %d model bytes; evicted %d this sweep",
+                            stats["sessions"], stats["evicted"], stats["controls"], stats["model_bytes"], evicted)
+                self.write_stats(stats)
+            except Exception:
+                logger.exception("Session sweep failed")
@@ -1,15 +1,45 @@
+import contextlib
+import functools
+
 import flet as ft
 
+# Style objects shared by every editor/session. They are not controls, but Flet does write to them:
+# ElevatedButton.before_update copies the button's color/bgcolor kwargs into its ButtonStyle and
+# re-wraps shape/padding/text_style in place. So buttons using a shared style must not pass those
+# kwargs; every update then writes back the same values.
+# FIX: Replaced ft.colors.with_opacity with Hex string "#1A000000" (10% Black)
+EDITOR_SHADOW = ft.BoxShadow(blur_radius=15, color="#1A000000")
+BTN_STYLE = ft.ButtonStyle(
+    shape=ft.RoundedRectangleBorder(radius=12),
+    padding=15,
+    bgcolor="#5E35B1",
+    color="white"
+)
+HEADER_TEXT_STYLE = ft.TextStyle(size=12, color="white")
+DAY_TEXT_STYLE = ft.TextStyle(size=12, color="white", weight="bold")
+CELL_TEXT_STYLE = ft.TextStyle(size=13)
+
+
+def session_event(handler):
+    """Runs an editor event inside the session's activity context (blocks idle eviction meanwhile)."""
+    @functools.wraps(handler)
+    def wrapper(self, *args):
+        with (self.activity() if self.activity else contextlib.nullcontext()):
+            return handler(self, *args)
+    return wrapper
+
 
 class TimetableEditor(ft.Container):
-    def __init__(self):
+    def __init__(self, state=None, activity=None):
         super().__init__()
         # Mobile UI Reference Style
         self.bgcolor = "#FFFFFF"
         self.border_radius = 20
         self.padding = 15
-        # FIX: Replaced ft.colors.with_opacity with Hex string "#1A000000" (10% Black)
-        self.shadow = ft.BoxShadow(blur_radius=15, color="#1A000000")
+        self.shadow = EDITOR_SHADOW
+
+        # Returns a context manager wrapped around every user edit (server mode: see SessionStore.activity)
+        self.activity = activity
 
         # DATA STRUCTURE: Rows=Days, Cols=Times
         self.days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
@@ -18,6 +48,14 @@ class TimetableEditor(ft.Container):
         # Grid Data
         self.grid_data = [["" for _ in self.times] for _ in self.days]
         self.merges = []
+
+        # Restore a previously saved model (see get_state)
+        if state:
+            self.days = list(state["days"])
+            self.times = list(state["times"])
+            self.grid_data = [list(row) for row in state["grid_data"]]
+            self.merges = [tuple(m) for m in state["merges"]]
+
         self.selected_cells = set()
         self.selection_mode = False
 
@@ -32,16 +70,12 @@ class TimetableEditor(ft.Container):
         )
 
         # Style Definitions
-        self.btn_style = ft.ButtonStyle(
-            shape=ft.RoundedRectangleBorder(radius=12),
-            padding=15,
-            color="white"
-        )
+        self.btn_style = BTN_STYLE
 
         # Controls
         self.btn_select = ft.IconButton("touch_app", icon_color="grey", on_click=self.toggle_mode,
                                         tooltip="Select Mode")
-        self.btn_merge = ft.ElevatedButton("Merge", icon="merge_type", bgcolor="#5E35B1", color="white", disabled=True,
+        self.btn_merge = ft.ElevatedButton("Merge", icon="merge_type", disabled=True,
                                            on_click=self.apply_merge, style=self.btn_style)
 
         self.content = ft.Column([
@@ -107,6 +141,16 @@ class TimetableEditor(ft.Container):
             ink=True
         )
 
+    # --- STATE ---
+    def get_state(self):
+        """Returns the timetable model as plain data, detached from the controls."""
+        return {
+            "days": list(self.days),
+            "times": list(self.times),
+            "grid_data": [list(row) for row in self.grid_data],
+            "merges": [list(m) for m in self.merges],
+        }
+
     # --- LOGIC ---
     def is_covered(self, r, c):
         for (mr, mc, rs, cs) in self.merges:
@@ -141,7 +185,7 @@ class TimetableEditor(ft.Container):
                 ft.Container(
                     width=CELL_W, height=50, bgcolor="#5E35B1", border_radius=10,
                     padding=5,
-                    content=ft.TextField(value=t, text_style=ft.TextStyle(size=12, color="white"),
+                    content=ft.TextField(value=t, text_style=HEADER_TEXT_STYLE,
                                          text_align=ft.TextAlign.CENTER, border=ft.InputBorder.NONE,
                                          on_change=lambda e, idx=i: self.update_time(e, idx))
                 )
@@ -156,7 +200,7 @@ class TimetableEditor(ft.Container):
                 ft.Container(
                     width=100, height=CELL_H, bgcolor="#00897B", border_radius=10,
                     padding=5,
-                    content=ft.TextField(value=day, text_style=ft.TextStyle(size=12, color="white", weight="bold"),
+                    content=ft.TextField(value=day, text_style=DAY_TEXT_STYLE,
                                          text_align=ft.TextAlign.CENTER, border=ft.InputBorder.NONE,
                                          on_change=lambda e, idx=r: self.update_day(e, idx))
                 )
@@ -185,7 +229,7 @@ class TimetableEditor(ft.Container):
                     bgcolor=bg, border=ft.border.all(1, border), border_radius=10,
                     content=ft.TextField(
                         value=val, read_only=self.selection_mode,
-                        text_style=ft.TextStyle(size=13), text_align=ft.TextAlign.CENTER, border=ft.InputBorder.NONE,
+                        text_style=CELL_TEXT_STYLE, text_align=ft.TextAlign.CENTER, border=ft.InputBorder.NONE,
                         on_change=lambda e, _r=r, _c=c: self.update_cell(e, _r, _c),
                         on_focus=lambda e, _r=r, _c=c: self.cell_click(e, _r, _c)
                     ),
@@ -200,20 +244,25 @@ class TimetableEditor(ft.Container):
         if run_update: self.update()
 
     # --- EVENTS ---
+    @session_event
     def update_cell(self, e, r, c):
         if not self.selection_mode: self.grid_data[r][c] = e.control.value
 
+    @session_event
     def update_day(self, e, i):
         self.days[i] = e.control.value
 
+    @session_event
     def update_time(self, e, i):
         self.times[i] = e.control.value
 
+    @session_event
     def add_time(self, e):
         self.times.append("00:00")
         for r in self.grid_data: r.append("")
         self.render_grid()
 
+    @session_event
     def remove_time(self, e):
         if len(self.times) > 1:
             self.times.pop()
@@ -221,11 +270,13 @@ class TimetableEditor(ft.Container):
             self.merges = []
             self.render_grid()
 
+    @session_event
     def add_day(self, e):
         self.days.append("Day")
         self.grid_data.append(["" for _ in self.times])
         self.render_grid()
 
+    @session_event
     def remove_day(self, e):
         if len(self.days) > 1:
             self.days.pop()
@@ -233,6 +284,7 @@ class TimetableEditor(ft.Container):
             self.merges = []
             self.render_grid()
 
+    @session_event
     def toggle_mode(self, e):
         self.selection_mode = not self.selection_mode
         self.btn_select.icon_color = "green" if self.selection_mode else "grey"
@@ -240,6 +292,7 @@ class TimetableEditor(ft.Container):
         self.btn_merge.disabled = True
         self.render_grid()
 
+    @session_event
     def cell_click(self, e, r, c):
         if not self.selection_mode: return
         coord = (r, c)
@@ -250,6 +303,7 @@ class TimetableEditor(ft.Container):
         self.btn_merge.disabled = len(self.selected_cells) < 2
         self.render_grid()
 
+    @session_event
     def apply_merge(self, e):
         rows = [x[0] for x in self.selected_cells]
         cols = [x[1] for x in self.selected_cells]
@@ -260,6 +314,7 @@ class TimetableEditor(ft.Container):
         self.merges.append((r, c, rs, cs))
         self.toggle_mode(None)
 
+    @session_event
     def clear_merges(self, e):
         self.merges = []
         self.render_grid()
\ No newline at end of file